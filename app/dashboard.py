@@ -10,6 +10,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
 
+from src.data_quality import repair_hourly_series
 from src.fetch_data import load_raw_data
 from src.preprocess import add_aqi_column, add_time_features
 from src.aqi_utils import aqi_category
@@ -137,11 +138,12 @@ def main():
     )
 
     # ---------- ДАННЫЕ ----------
-    raw_df = load_raw_data()
+    raw_df, _ = repair_hourly_series(load_raw_data())
     df = add_aqi_column(add_time_features(raw_df))
     df = df.sort_values("datetime").reset_index(drop=True)
 
-    latest = df.iloc[-1]
+    # последний час с полными данными — в длинных пропусках AQI = NaN
+    latest = df[~df["is_gap"]].iloc[-1]
     latest_aqi = float(latest["aqi"])
     latest_time = latest["datetime"]
     latest_cat = aqi_category(int(latest_aqi))
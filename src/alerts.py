@@ -0,0 +1,156 @@
+import queue
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .aqi_utils import aqi_category
+
+# Границы категорий из aqi_category. Подписка без колонки threshold
+# получает алерты по всем этим порогам.
+ALERT_THRESHOLDS = (100, 150, 200)
+
+# По этому ключу дедуплицируются повторные алерты
+ALERT_KEY = ["subscription_id", "station_id", "threshold"]
+
+
+class QueueSink:
+    """
+    Складывает алерты в очередь — один DataFrame на цикл, чтобы не платить
+    за поштучный put на сотнях тысяч алертов. Удобно для тестов.
+    """
+
+    def __init__(self, q: queue.Queue | None = None):
+        self.queue = q if q is not None else queue.Queue()
+
+    def emit(self, alerts: pd.DataFrame) -> None:
+        if not alerts.empty:
+            self.queue.put(alerts)
+
+
+class JsonlFileSink:
+    """
+    Дописывает алерты в локальный файл, по одной JSON-строке на алерт.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def emit(self, alerts: pd.DataFrame) -> None:
+        if alerts.empty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(alerts.to_json(orient="records", lines=True, force_ascii=False))
+
+
+def find_exceedances(
+    forecasts: pd.DataFrame,
+    subscriptions: pd.DataFrame,
+    current: pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    Находит подписки, у которых прогноз AQI в ближайшие часы выше порога.
+
+    forecasts: индекс — station_id, колонки — горизонты (1..24 ч), значения — AQI.
+    subscriptions: колонки subscription_id, station_id и, опционально, threshold.
+                   Без threshold каждая подписка проверяется на все ALERT_THRESHOLDS.
+    current: текущий AQI по станциям. Если задан, в колонке above_now
+             отмечается, что порог превышен уже сейчас.
+
+    Всё считается векторно: сначала по уникальным парам (станция, порог),
+    потом результат раскладывается на подписки индексированием numpy.
+    """
+    if "threshold" not in subscriptions.columns:
+        subscriptions = subscriptions.merge(pd.DataFrame({"threshold": ALERT_THRESHOLDS}), how="cross")
+
+    curves = forecasts.to_numpy(dtype=float)
+    horizons = np.asarray(forecasts.columns)
+
+    station_pos = forecasts.index.get_indexer(subscriptions["station_id"])
+    known = station_pos >= 0
+    subs = subscriptions[known]
+    station_pos = station_pos[known]
+    thresholds = subs["threshold"].to_numpy(dtype=float)
+
+    # уникальные пары (станция, порог): подписок много, пар — мало.
+    # Пару кодируем одним int, 1D unique заметно быстрее unique(axis=0).
+    thr_values, thr_pos = np.unique(thresholds, return_inverse=True)
+    pair_key = station_pos.astype(np.int64) * len(thr_values) + thr_pos
+    uniq, inverse = np.unique(pair_key, return_inverse=True)
+    u_station = uniq // len(thr_values)
+    u_threshold = thr_values[uniq % len(thr_values)]
+
+    above = curves[u_station] > u_threshold[:, None]
+    exceeded = above.any(axis=1)
+    if current is not None:
+        now = current.reindex(forecasts.index).to_numpy(dtype=float)[u_station]
+        above_now = now > u_threshold
+    else:
+        above_now = np.zeros(len(uniq), dtype=bool)
+
+    first_hour = horizons[above.argmax(axis=1)]
+    peak = curves[u_station].max(axis=1)
+
+    hit = exceeded[inverse]
+    result = pd.DataFrame(
+        {
+            "subscription_id": subs["subscription_id"].to_numpy()[hit],
+            "station_id": forecasts.index.to_numpy()[station_pos[hit]],
+            "threshold": thresholds[hit],
+            "hours_ahead": first_hour[inverse][hit],
+            "peak_aqi": peak[inverse][hit].round(),
+            "above_now": above_now[inverse][hit],
+        }
+    )
+
+    # категорию считаем один раз на уникальный порог, а не на каждую подписку
+    categories = {t: aqi_category(int(t) + 1) for t in np.unique(result["threshold"])}
+    result["category"] = result["threshold"].map(categories)
+    return result
+
+
+def find_crossings(
+    forecasts: pd.DataFrame,
+    subscriptions: pd.DataFrame,
+    current: pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    Подписки, у которых прогноз AQI пересечёт порог вверх: прогноз выше порога,
+    а сейчас (если current задан) порог ещё не превышен.
+    """
+    exceedances = find_exceedances(forecasts, subscriptions, current)
+    return exceedances[~exceedances["above_now"]].drop(columns="above_now").reset_index(drop=True)
+
+
+class AlertEngine:
+    """
+    Раз в час проверяет прогнозы и отправляет алерты в sink.
+
+    Повторно по той же (подписка, станция, порог) не шлём, пока прогноз остаётся
+    выше порога — независимо от того, как колеблется текущий AQI; когда прогноз
+    опустился ниже, алерт снова может сработать. current влияет только на то,
+    отправлять ли новый алерт (если порог уже превышен сейчас — это не «пересечение»).
+    Разные пороги одной подписки друг друга не глушат.
+    sink — любой объект с методом emit(alerts: pd.DataFrame).
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self._active = pd.MultiIndex.from_arrays([[], [], []], names=ALERT_KEY)
+
+    def run_cycle(
+        self,
+        forecasts: pd.DataFrame,
+        subscriptions: pd.DataFrame,
+        current: pd.Series | None = None,
+    ) -> pd.DataFrame:
+        exceedances = find_exceedances(forecasts, subscriptions, current)
+
+        keys = pd.MultiIndex.from_frame(exceedances[ALERT_KEY])
+        is_new = ~keys.isin(self._active) & ~exceedances["above_now"].to_numpy()
+        new_alerts = exceedances[is_new].drop(columns="above_now").reset_index(drop=True)
+        self._active = keys
+
+        self.sink.emit(new_alerts)
+        return new_alerts
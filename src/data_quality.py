@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+# Физически допустимые диапазоны. Всё, что вне их, — сбой датчика/модели,
+# а не реальный смог, поэтому такие значения выбрасываем и чиним как пропуск.
+VALID_RANGES = {
+    "pm25": (0.0, 1000.0),
+    "pm10": (0.0, 2000.0),
+    "aqi_external": (0.0, 500.0),
+}
+
+# Пропуски длиной до стольких часов заполняем интерполяцией,
+# более длинные оставляем NaN.
+MAX_FILL_HOURS = 3
+
+# Колонки сырого ряда, которые идут в признаки/таргет. Только их NaN
+# делает строку непригодной (is_gap); пропуски в остальных идут лишь в статистику.
+GAP_COLUMNS = ["pm25", "temperature", "humidity", "wind_speed"]
+
+
+def _short_gap_mask(isna: pd.Series, max_gap: int) -> pd.Series:
+    """
+    Маска пропусков, которые входят в серию NaN длиной не больше max_gap.
+    Длина серии считается векторно через cumsum, без цикла по строкам.
+    """
+    run_id = (~isna).cumsum()
+    run_len = isna.groupby(run_id).transform("sum")
+    return isna & (run_len <= max_gap)
+
+
+def repair_hourly_series(df: pd.DataFrame, max_gap_hours: int = MAX_FILL_HOURS) -> tuple[pd.DataFrame, dict]:
+    """
+    Проверка качества и починка сырого почасового ряда.
+    Работает векторно над всем df в памяти: по проходу на каждую колонку
+    из VALID_RANGES и по одной интерполяции на числовую колонку.
+      - дубли по datetime схлопываются (берём последнее значение);
+      - ряд переиндексируется на строгую почасовую сетку;
+      - значения вне VALID_RANGES считаются выбросами и превращаются в NaN;
+      - короткие пропуски (<= max_gap_hours) интерполируются по времени;
+      - длинные остаются NaN; если NaN остался в одной из GAP_COLUMNS,
+        строка помечается is_gap=True.
+
+    Возвращает (очищенный df, словарь со статистикой качества).
+    """
+    n_raw = len(df)
+
+    df = df.sort_values("datetime")
+    dup_mask = df["datetime"].duplicated(keep="last")
+    n_duplicates = int(dup_mask.sum())
+    df = df[~dup_mask].set_index("datetime")
+
+    grid = pd.date_range(df.index.min(), df.index.max(), freq="h", name="datetime")
+    n_missing_hours = len(grid) - len(df.index.intersection(grid))
+    df = df.reindex(grid)
+
+    value_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+
+    n_outliers = 0
+    for col, (low, high) in VALID_RANGES.items():
+        if col not in df.columns:
+            continue
+        bad = (df[col] < low) | (df[col] > high)
+        n_outliers += int(bad.sum())
+        df.loc[bad, col] = np.nan
+
+    n_filled = 0
+    for col in value_cols:
+        isna = df[col].isna()
+        filled = df[col].interpolate(method="time", limit_area="inside")
+        # края ряда interpolate не трогает, поэтому считаем только реально заполненное
+        repaired = _short_gap_mask(isna, max_gap_hours) & filled.notna()
+        df[col] = df[col].where(~repaired, filled)
+        n_filled += int(repaired.sum())
+
+    gap_cols = [c for c in GAP_COLUMNS if c in df.columns]
+    other = [c for c in value_cols if c not in gap_cols]
+    gap = df[gap_cols].isna().any(axis=1)
+    n_other_missing = int(df[other].isna().sum().sum())
+
+    df["is_gap"] = gap
+    df = df.reset_index()
+
+    stats = {
+        "rows_raw": n_raw,
+        "rows_hourly": len(df),
+        "duplicates": n_duplicates,
+        "missing_hours": int(n_missing_hours),
+        "outliers": n_outliers,
+        "filled_values": n_filled,
+        "gap_hours": int(gap.sum()),
+        "other_missing_values": n_other_missing,
+        "coverage": float(1 - gap.mean()) if len(df) else 0.0,
+    }
+    return df, stats
@@ -0,0 +1,271 @@
+import numpy as np
+import pandas as pd
+
+# Гистограммы: столько корзин между min и max обучающей выборки,
+# плюс две открытые корзины по краям («ниже всего, что видели» / «выше»).
+N_BINS = 10
+
+# PSI > 0.25 — классический порог «распределение заметно поехало».
+# На малых выборках PSI шумит даже без сдвига (ожидание ~ (k-1)*(1/n + 1/N)),
+# поэтому к порогу добавляется эта поправка — см. DriftMonitor.psi_threshold.
+PSI_RETRAIN_THRESHOLD = 0.25
+
+# Live-статистика сравнивается только за последние столько часов (скользящее окно
+# из дневных гистограмм), и пока в окне меньше этого числа часов, выводов не делаем.
+# Без окна старая история «размывает» свежий сдвиг и дрейф со временем не ловится.
+MIN_LIVE_HOURS = 24 * 7
+
+# Циклические календарные признаки: за любые сутки-двое они покрывают лишь часть
+# своего цикла, и PSI против недельной обучающей выборки всегда «дрейфует».
+# month не циклический в этом смысле — его сдвиг как раз и нужно ловить.
+CYCLIC_FEATURES = ("hour", "dayofweek")
+
+_PSI_EPS = 1e-4
+
+_NS_PER_DAY = 86_400 * 10**9
+
+
+def _bin_edges(values: np.ndarray) -> np.ndarray:
+    if len(values) == 0:
+        return np.array([])
+    lo, hi = float(np.min(values)), float(np.max(values))
+    edges = np.linspace(lo, hi, N_BINS + 1) if hi > lo else np.array([lo, hi])
+    # чтобы максимум попадал во внутреннюю корзину, а не в верхнюю открытую
+    edges[-1] = np.nextafter(hi, np.inf)
+    return edges
+
+
+class RunningStats:
+    """
+    Сводка одного признака: число значений, среднее, сумма квадратов отклонений
+    и гистограмма с фиксированными корзинами. Хранит эталон из обучения
+    и результат WindowedStats.window().
+    """
+
+    def __init__(self, edges: np.ndarray):
+        self.edges = np.asarray(edges, dtype=float)
+        self.hist = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @classmethod
+    def from_values(cls, values) -> "RunningStats":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        stats = cls(_bin_edges(values))
+        if len(values) == 0:
+            return stats
+        stats.count = len(values)
+        stats.mean = float(values.mean())
+        stats.m2 = float(((values - stats.mean) ** 2).sum())
+        idx = np.searchsorted(stats.edges, values, side="right")
+        stats.hist = np.bincount(idx, minlength=len(stats.hist)).astype(np.int64)
+        return stats
+
+    @property
+    def std(self) -> float:
+        return (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+    def psi(self, other: "RunningStats") -> float:
+        """
+        Population Stability Index между этой (эталонной) сводкой и other.
+        Корзины должны совпадать — live-сводка создаётся с edges эталона.
+        """
+        if self.count == 0 or other.count == 0:
+            return 0.0
+        p = self.hist / self.count + _PSI_EPS
+        q = other.hist / other.count + _PSI_EPS
+        return float(((q - p) * np.log(q / p)).sum())
+
+    def to_dict(self) -> dict:
+        return {
+            "edges": self.edges,
+            "hist": self.hist,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningStats":
+        stats = cls(data["edges"])
+        stats.hist = np.asarray(data["hist"], dtype=np.int64).copy()
+        stats.count = int(data["count"])
+        stats.mean = float(data["mean"])
+        stats.m2 = float(data["m2"])
+        return stats
+
+
+class WindowedStats:
+    """
+    Live-сводка признака за последние n_days дней: кольцо дневных гистограмм
+    и сумм. update() — O(1): пишет в корзину своего дня, а корзину, оставшуюся
+    от дня n_days назад, сначала обнуляет. window() складывает кольцо в RunningStats.
+    """
+
+    def __init__(self, edges: np.ndarray, n_days: int):
+        self.edges = np.asarray(edges, dtype=float)
+        self.n_days = n_days
+        self.days = np.full(n_days, -1, dtype=np.int64)
+        self.hist = np.zeros((n_days, len(self.edges) + 1), dtype=np.int64)
+        self.count = np.zeros(n_days, dtype=np.int64)
+        self.total = np.zeros(n_days)
+        self.total_sq = np.zeros(n_days)
+        self.last_day = -1
+
+    def update(self, x: float, when: pd.Timestamp) -> None:
+        x = float(x)
+        if np.isnan(x):
+            return
+        day = pd.Timestamp(when).value // _NS_PER_DAY
+        if day <= self.last_day - self.n_days:
+            return  # слишком старое значение, окно уже ушло вперёд
+
+        slot = day % self.n_days
+        if self.days[slot] != day:
+            self.days[slot] = day
+            self.hist[slot] = 0
+            self.count[slot] = 0
+            self.total[slot] = 0.0
+            self.total_sq[slot] = 0.0
+        self.last_day = max(self.last_day, day)
+
+        self.hist[slot, np.searchsorted(self.edges, x, side="right")] += 1
+        self.count[slot] += 1
+        self.total[slot] += x
+        self.total_sq[slot] += x * x
+
+    def window(self) -> RunningStats:
+        fresh = (self.days >= 0) & (self.days > self.last_day - self.n_days)
+        stats = RunningStats(self.edges)
+        stats.count = int(self.count[fresh].sum())
+        if stats.count:
+            stats.hist = self.hist[fresh].sum(axis=0)
+            stats.mean = float(self.total[fresh].sum() / stats.count)
+            stats.m2 = max(float(self.total_sq[fresh].sum()) - stats.count * stats.mean**2, 0.0)
+        return stats
+
+    def to_dict(self) -> dict:
+        return {
+            "edges": self.edges,
+            "n_days": self.n_days,
+            "days": self.days,
+            "hist": self.hist,
+            "count": self.count,
+            "total": self.total,
+            "total_sq": self.total_sq,
+            "last_day": self.last_day,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WindowedStats":
+        stats = cls(data["edges"], int(data["n_days"]))
+        stats.days = np.asarray(data["days"], dtype=np.int64).copy()
+        stats.hist = np.asarray(data["hist"], dtype=np.int64).copy()
+        stats.count = np.asarray(data["count"], dtype=np.int64).copy()
+        stats.total = np.asarray(data["total"], dtype=float).copy()
+        stats.total_sq = np.asarray(data["total_sq"], dtype=float).copy()
+        stats.last_day = int(data["last_day"])
+        return stats
+
+
+def summarize_training(X: pd.DataFrame, residuals) -> dict:
+    """
+    Сводки признаков и остатков на момент обучения — кладутся в артефакт модели.
+    CYCLIC_FEATURES пропускаются: для них PSI на коротком окне бессмыслен.
+    """
+    summary = {
+        col: RunningStats.from_values(X[col]).to_dict()
+        for col in X.columns
+        if col not in CYCLIC_FEATURES
+    }
+    summary["residual"] = RunningStats.from_values(residuals).to_dict()
+    return summary
+
+
+class DriftMonitor:
+    """
+    Сравнивает live-поток признаков и остатков с обучающими сводками из артефакта.
+
+    update(row, when) вызывается раз в час с признаками, update_residual(actual,
+    predicted, when) — когда приходит факт. Оба — O(1). Сравнение идёт по
+    скользящему окну последних ~min_hours часов. needs_retrain() говорит,
+    пора ли переобучать. Live-состояние сохраняется через to_dict()/state=.
+    """
+
+    def __init__(
+        self,
+        artifact: dict,
+        threshold: float = PSI_RETRAIN_THRESHOLD,
+        min_hours: int = MIN_LIVE_HOURS,
+        state: dict | None = None,
+    ):
+        if "drift_summary" not in artifact:
+            raise ValueError("В артефакте нет drift_summary — переобучите модель текущей версией train_model")
+
+        self.features = artifact["features"]
+        self.trained_at = artifact.get("trained_at")
+        self.threshold = threshold
+        self.min_hours = min_hours
+        self.reference = {
+            name: RunningStats.from_dict(data) for name, data in artifact["drift_summary"].items()
+        }
+        # +1 день: текущий день в окне обычно неполный
+        n_days = -(-min_hours // 24) + 1
+        self.live = {name: WindowedStats(ref.edges, n_days) for name, ref in self.reference.items()}
+        # часы, на которых модель обучалась, в live не берём — там остатки in-sample
+        self.last_seen = artifact.get("trained_until")
+
+        # состояние от другой версии модели не подходит — её эталон уже другой
+        if state is not None and state.get("trained_at") == self.trained_at:
+            self.live = {name: WindowedStats.from_dict(data) for name, data in state["live"].items()}
+            self.last_seen = state["last_seen"]
+
+    def update(self, row, when: pd.Timestamp) -> None:
+        for col in self.features:
+            if col in self.live:
+                self.live[col].update(row[col], when)
+        if self.last_seen is None or when > self.last_seen:
+            self.last_seen = when
+
+    def update_residual(self, actual: float, predicted: float, when: pd.Timestamp) -> None:
+        self.live["residual"].update(actual - predicted, when)
+
+    def to_dict(self) -> dict:
+        return {
+            "trained_at": self.trained_at,
+            "last_seen": self.last_seen,
+            "live": {name: stats.to_dict() for name, stats in self.live.items()},
+        }
+
+    def psi_threshold(self, ref: RunningStats, live: RunningStats) -> float:
+        """
+        Порог PSI с поправкой на размер выборок: ожидаемый PSI без всякого
+        сдвига ~ (k-1)*(1/n_live + 1/n_ref), k — число корзин.
+        """
+        if ref.count == 0 or live.count == 0:
+            return np.inf
+        noise = (len(ref.hist) - 1) * (1 / live.count + 1 / ref.count)
+        return self.threshold + noise
+
+    def report(self) -> pd.DataFrame:
+        rows = []
+        for name, ref in self.reference.items():
+            live = self.live[name].window()
+            rows.append(
+                {
+                    "name": name,
+                    "train_mean": ref.mean,
+                    "live_mean": live.mean if live.count else np.nan,
+                    "live_hours": live.count,
+                    "psi": ref.psi(live),
+                    "psi_threshold": self.psi_threshold(ref, live),
+                }
+            )
+        report = pd.DataFrame(rows).set_index("name")
+        report["drifted"] = (report["live_hours"] >= self.min_hours) & (report["psi"] > report["psi_threshold"])
+        return report
+
+    def needs_retrain(self) -> bool:
+        return bool(self.report()["drifted"].any())
@@ -61,12 +61,24 @@ def fetch_from_api_and_save(past_days: int = 7, forecast_days: int = 1) -> Path:
     return file_path
 
 
+REQUIRED_COLUMNS = ["datetime", "pm25"]
+
+
 def load_raw_data() -> pd.DataFrame:
     """
     Загружает последний сырой файл.
     Если его нет — тянет с API.
+    Проверяет, что есть обязательные колонки и что файл не пустой.
     """
     file_path = DATA_RAW / "bishkek_air_opemeteo.csv"
     if not file_path.exists():
         file_path = fetch_from_api_and_save()
-    return pd.read_csv(file_path, parse_dates=["datetime"])
+    df = pd.read_csv(file_path, parse_dates=["datetime"])
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise RuntimeError(f"В {file_path.name} нет колонок: {', '.join(missing)}")
+    if df.empty:
+        raise RuntimeError(f"{file_path.name} пустой")
+
+    return df
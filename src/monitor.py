@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+from .data_quality import repair_hourly_series
+from .drift import DriftMonitor
+from .fetch_data import fetch_from_api_and_save, load_raw_data
+from .preprocess import add_aqi_column, add_time_features
+from .train_model import (
+    DEFAULT_BACKEND,
+    fit_and_measure,
+    model_path_for,
+    prepare_horizon_split,
+    retrain_if_drifted,
+)
+
+MONITOR_DIR = Path(__file__).resolve().parents[1] / "data" / "monitor"
+
+# Open-Meteo отдаёт время в локальной зоне (timezone=auto), т.е. по Бишкеку
+TIMEZONE = "Asia/Bishkek"
+
+
+def state_path_for(n_hours_ahead: int, backend: str = DEFAULT_BACKEND) -> Path:
+    return MONITOR_DIR / f"drift_state_{n_hours_ahead}h_{backend}.joblib"
+
+
+def load_monitor(artifact: dict, n_hours_ahead: int, backend: str = DEFAULT_BACKEND) -> DriftMonitor:
+    """
+    Монитор для артефакта с сохранённым live-состоянием, если оно есть
+    и относится к этой же версии модели.
+    """
+    path = state_path_for(n_hours_ahead, backend)
+    state = joblib.load(path) if path.exists() else None
+    return DriftMonitor(artifact, state=state)
+
+
+def feed_new_hours(monitor: DriftMonitor, df: pd.DataFrame, model, n_hours_ahead: int) -> int:
+    """
+    Подаёт в монитор часы, которых он ещё не видел (после monitor.last_seen).
+    Остаток для часа t — факт AQI в t минус прогноз модели по признакам t - n_hours_ahead.
+    Возвращает число поданных часов.
+    """
+    new = df if monitor.last_seen is None else df[df["datetime"] > monitor.last_seen]
+    if new.empty:
+        return 0
+
+    by_time = df.set_index("datetime")
+    source = by_time.reindex(new["datetime"] - pd.Timedelta(hours=n_hours_ahead))[monitor.features]
+    has_source = source.notna().all(axis=1).to_numpy()
+    predicted = pd.Series(float("nan"), index=new.index)
+    if has_source.any():
+        predicted[has_source] = model.predict(source[has_source])
+
+    for (i, row), pred in zip(new.iterrows(), predicted):
+        monitor.update(row, row["datetime"])
+        if pred == pred:  # не NaN
+            monitor.update_residual(row["aqi"], pred, row["datetime"])
+    return len(new)
+
+
+def run_drift_cycle(
+    horizons=range(1, 25),
+    backend: str = DEFAULT_BACKEND,
+    past_days: int = 7,
+    now: pd.Timestamp | None = None,
+) -> pd.DataFrame:
+    """
+    Один часовой цикл мониторинга (запускать по cron: python -m src.monitor).
+
+    Данные тянутся с API один раз на цикл, затем для каждого горизонта:
+    монитор поднимается из сохранённого состояния, получает новые часы,
+    при дрейфе модель переобучается на этих же свежих данных, состояние сохраняется.
+    Артефакты старой версии без drift_summary один раз переобучаются,
+    чтобы у монитора появился эталон.
+    """
+    fetch_from_api_and_save(past_days=past_days)
+    raw_df, quality = repair_hourly_series(load_raw_data())
+
+    if now is None:
+        now = pd.Timestamp.now(tz=TIMEZONE).tz_localize(None)
+    df = add_aqi_column(add_time_features(raw_df))
+    # будущие часы — это прогноз Open-Meteo, а не факт
+    df = df[~df["is_gap"] & (df["datetime"] <= now)]
+
+    MONITOR_DIR.mkdir(parents=True, exist_ok=True)
+
+    rows = []
+    for h in horizons:
+        artifact = joblib.load(model_path_for(h, backend))
+        reference_missing = "drift_summary" not in artifact
+        if reference_missing:
+            print(f"Горизонт {h} ч: в модели нет эталонных сводок — переобучаем один раз")
+            fit_and_measure(prepare_horizon_split(raw_df, h), h, backend)
+            artifact = joblib.load(model_path_for(h, backend))
+
+        monitor = load_monitor(artifact, h, backend)
+        fed = feed_new_hours(monitor, df, artifact["model"], h)
+        metrics, monitor = retrain_if_drifted(h, monitor, raw_df, backend)
+
+        joblib.dump(monitor.to_dict(), state_path_for(h, backend))
+        rows.append(
+            {
+                "horizon": h,
+                "new_hours": fed,
+                "retrained": metrics is not None,
+                "reference_missing": reference_missing,
+            }
+        )
+
+    return pd.DataFrame(rows).set_index("horizon")
+
+
+if __name__ == "__main__":
+    print(run_drift_cycle().to_string())
@@ -15,7 +15,8 @@ def add_time_features(df: pd.DataFrame) -> pd.DataFrame:
 
 def add_aqi_column(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
-    df["aqi"] = df["pm25"].apply(pm25_to_aqi)
+    # NaN (длинные пропуски) оставляем NaN, а не превращаем в AQI=500
+    df["aqi"] = df["pm25"].map(pm25_to_aqi, na_action="ignore")
     return df
 
 
@@ -24,10 +25,16 @@ def make_supervised(df: pd.DataFrame, target_col: str = "aqi", n_hours_ahead: in
     Создаём supervised-датасет:
     признаки = текущее время, погода и т.д.
     таргет = AQI через n_hours_ahead часов.
+
+    Сдвиг делается по времени, а не по позиции строки: таргет ищется
+    ровно на datetime + n_hours_ahead, поэтому пропущенный час даёт NaN,
+    а не тихо подставляет значение из другого часа.
     """
-    df = df.copy().sort_values("datetime")
+    df = df.sort_values("datetime").drop_duplicates("datetime", keep="last")
 
-    df["target"] = df[target_col].shift(-n_hours_ahead)
+    by_time = df.set_index("datetime")[target_col]
+    target_time = df["datetime"] + pd.Timedelta(hours=n_hours_ahead)
+    df["target"] = by_time.reindex(target_time).to_numpy()
 
     # удалить последние строки, где таргет NaN
     df = df.dropna(subset=["target"])
@@ -43,6 +50,10 @@ def preprocess_for_training(raw_df: pd.DataFrame, n_hours_ahead: int = 1) -> pd.
 
     df = make_supervised(df, target_col="aqi", n_hours_ahead=n_hours_ahead)
 
+    # строки внутри длинных пропусков в обучение не берём
+    if "is_gap" in df.columns:
+        df = df[~df["is_gap"]].drop(columns=["is_gap"])
+
     DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
     out_path = DATA_PROCESSED / f"training_data_{n_hours_ahead}h.csv"
     df.to_csv(out_path, index=False)
@@ -1,55 +1,237 @@
+import time
 from pathlib import Path
 
 import joblib
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 
+from .data_quality import repair_hourly_series
+from .drift import DriftMonitor, summarize_training
 from .fetch_data import load_raw_data
 from .preprocess import preprocess_for_training
 
 MODELS_DIR = Path(__file__).resolve().parents[1] / "models"
 
-
-def train_aqi_model(n_hours_ahead: int = 1):
-    raw_df = load_raw_data()
+# Конфиги бэкендов: класс эстиматора + его параметры.
+# Чтобы добавить новый бэкенд, достаточно дописать сюда ещё одну запись.
+MODEL_CONFIGS = {
+    "random_forest": {
+        "estimator": RandomForestRegressor,
+        "params": {
+            "n_estimators": 200,
+            "random_state": 42,
+            "n_jobs": -1,
+        },
+    },
+    "hist_gb": {
+        # Бинит признаки (до 255 корзин), поэтому fit/predict быстро
+        # масштабируются на миллионы строк, а артефакт получается крошечным.
+        "estimator": HistGradientBoostingRegressor,
+        "params": {
+            "max_iter": 200,
+            "learning_rate": 0.1,
+            "random_state": 42,
+        },
+    },
+}
+
+DEFAULT_BACKEND = "random_forest"
+
+
+def build_estimator(backend: str = DEFAULT_BACKEND):
+    """
+    Создаёт эстиматор по имени бэкенда из MODEL_CONFIGS.
+    """
+    if backend not in MODEL_CONFIGS:
+        raise ValueError(
+            f"Неизвестный бэкенд '{backend}', доступны: {', '.join(MODEL_CONFIGS)}"
+        )
+    config = MODEL_CONFIGS[backend]
+    return config["estimator"](**config["params"])
+
+
+def model_path_for(n_hours_ahead: int, backend: str = DEFAULT_BACKEND) -> Path:
+    """
+    Путь к артефакту модели. Для бэкенда по умолчанию имя не меняется,
+    чтобы дашборд продолжал подхватывать модели как раньше.
+    """
+    if backend == DEFAULT_BACKEND:
+        return MODELS_DIR / f"aqi_model_{n_hours_ahead}h.joblib"
+    return MODELS_DIR / f"aqi_model_{n_hours_ahead}h_{backend}.joblib"
+
+
+def prepare_horizon_split(raw_df: pd.DataFrame, n_hours_ahead: int) -> tuple:
+    """
+    Готовит train/val разбиение для одного горизонта.
+    raw_df — уже прошедший repair_hourly_series сырой ряд.
+    Возвращает (X_train, X_val, y_train, y_val).
+    """
     df = preprocess_for_training(raw_df, n_hours_ahead=n_hours_ahead)
 
     feature_cols = ["pm25", "temperature", "humidity", "wind_speed", "hour", "dayofweek", "month"]
     feature_cols = [c for c in feature_cols if c in df.columns]
 
+    if len(df) < 2:
+        raise ValueError(
+            f"Горизонт {n_hours_ahead} ч: после очистки осталось {len(df)} строк, обучать не на чем"
+        )
+
+    # индекс — время, чтобы после обучения знать, докуда модель видела данные
+    df = df.set_index("datetime")
     X = df[feature_cols]
     y = df["target"]
 
-    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, shuffle=False)
+    return train_test_split(X, y, test_size=0.2, shuffle=False)
 
-    model = RandomForestRegressor(
-        n_estimators=200,
-        random_state=42,
-        n_jobs=-1
-    )
 
+def fit_and_measure(split: tuple, n_hours_ahead: int, backend: str = DEFAULT_BACKEND) -> dict:
+    """
+    Обучает бэкенд на готовом разбиении, сохраняет модель и возвращает метрики:
+    MAE/RMSE, время обучения, размер артефакта и задержку предсказания одной строки.
+    """
+    X_train, X_val, y_train, y_val = split
+    feature_cols = list(X_train.columns)
+
+    # после выкидывания длинных пропусков короткий ряд может опустеть
+    if X_train.empty or X_val.empty:
+        raise ValueError(
+            f"Горизонт {n_hours_ahead} ч: после очистки мало строк "
+            f"(train={len(X_train)}, val={len(X_val)}), обучать не на чем"
+        )
+
+    model = build_estimator(backend)
+
+    start = time.perf_counter()
     model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
 
     y_pred = model.predict(X_val)
     mae = mean_absolute_error(y_val, y_pred)
     mse = mean_squared_error(y_val, y_pred)
     rmse = mse ** 0.5
 
-    print(f"MAE: {mae:.2f}, RMSE: {rmse:.2f}")
+    # задержка на одну строку — так модель вызывается в дашборде
+    one_row = X_val.iloc[[0]]
+    n_repeats = 20
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        model.predict(one_row)
+    latency_ms = (time.perf_counter() - start) / n_repeats * 1000
 
+    print(f"[{backend}] MAE: {mae:.2f}, RMSE: {rmse:.2f}")
 
     MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    model_path = MODELS_DIR / f"aqi_model_{n_hours_ahead}h.joblib"
-    joblib.dump({"model": model, "features": feature_cols}, model_path)
+    model_path = model_path_for(n_hours_ahead, backend)
+    joblib.dump(
+        {
+            "model": model,
+            "features": feature_cols,
+            "backend": backend,
+            # эталонные сводки для DriftMonitor; trained_at отличает версии модели,
+            # trained_until — последний час, который модель видела (с учётом таргета)
+            "drift_summary": summarize_training(X_train, y_val - y_pred),
+            "trained_at": pd.Timestamp.now().isoformat(),
+            "trained_until": X_val.index.max() + pd.Timedelta(hours=n_hours_ahead),
+        },
+        model_path,
+    )
+    size_kb = model_path.stat().st_size / 1024
 
     print(f"Модель сохранена в {model_path}")
 
+    return {
+        "horizon": n_hours_ahead,
+        "backend": backend,
+        "mae": mae,
+        "rmse": rmse,
+        "fit_s": fit_seconds,
+        "size_kb": size_kb,
+        "latency_ms": latency_ms,
+    }
+
+
+def print_quality(quality: dict) -> None:
+    print(
+        f"Качество данных: дублей {quality['duplicates']}, пропущенных часов {quality['missing_hours']}, "
+        f"выбросов {quality['outliers']}, заполнено {quality['filled_values']}, "
+        f"в длинных пропусках {quality['gap_hours']} ч (покрытие {quality['coverage']:.1%})"
+    )
+
+
+def train_aqi_model(n_hours_ahead: int = 1, backend: str = DEFAULT_BACKEND) -> dict:
+    """
+    Обучает модель на горизонт n_hours_ahead и сохраняет её.
+    Возвращает метрики модели вместе со статистикой качества входных данных.
+    """
+    raw_df, quality = repair_hourly_series(load_raw_data())
+    print_quality(quality)
+
+    split = prepare_horizon_split(raw_df, n_hours_ahead)
+    metrics = fit_and_measure(split, n_hours_ahead, backend)
+    return {**metrics, **{f"dq_{k}": v for k, v in quality.items()}}
+
+
+def retrain_if_drifted(
+    n_hours_ahead: int,
+    monitor: DriftMonitor,
+    raw_df: pd.DataFrame,
+    backend: str = DEFAULT_BACKEND,
+) -> tuple[dict | None, DriftMonitor]:
+    """
+    Переобучает модель, только если DriftMonitor зафиксировал дрейф.
+
+    raw_df — свежий ряд после repair_hourly_series. Тянуть его с API — дело
+    вызывающего (один раз на цикл для всех горизонтов, см. src.monitor),
+    иначе каждый горизонт перезаписывал бы общий сырой CSV.
+    Возвращает (метрики, монитор): метрики None, если переобучать не нужно;
+    после переобучения — новый монитор с эталоном из нового артефакта.
+    """
+    if not monitor.needs_retrain():
+        return None, monitor
+
+    drifted = monitor.report().query("drifted").index.tolist()
+    print(f"Дрейф для горизонта {n_hours_ahead} ч: {', '.join(drifted)} — переобучаем")
+
+    split = prepare_horizon_split(raw_df, n_hours_ahead)
+    metrics = fit_and_measure(split, n_hours_ahead, backend)
+
+    artifact = joblib.load(model_path_for(n_hours_ahead, backend))
+    new_monitor = DriftMonitor(artifact, threshold=monitor.threshold, min_hours=monitor.min_hours)
+    return metrics, new_monitor
+
+
+def compare_backends(horizons=range(1, 25), backends=tuple(MODEL_CONFIGS)) -> tuple[pd.DataFrame, dict]:
+    """
+    Обучает все бэкенды на всех горизонтах и возвращает (таблица, качество данных):
+    в таблице метрики бэкендов стоят рядом для каждого горизонта,
+    второй элемент — статистика repair_hourly_series для общего входного ряда.
+
+    Сырые данные грузятся и чинятся один раз, разбиение — один раз на горизонт.
+    """
+    raw_df, quality = repair_hourly_series(load_raw_data())
+    print_quality(quality)
+
+    rows = []
+    for h in horizons:
+        split = prepare_horizon_split(raw_df, h)
+        for backend in backends:
+            print("=" * 50)
+            print(f"Обучаем {backend} для горизонта {h} ч вперёд")
+            rows.append(fit_and_measure(split, h, backend))
+
+    report = pd.DataFrame(rows).pivot(
+        index="horizon",
+        columns="backend",
+        values=["mae", "rmse", "fit_s", "size_kb", "latency_ms"],
+    )
+    return report, quality
+
 
 if __name__ == "__main__":
-    # Обучаем модели для горизонтов 1..24 часов
-    for h in range(1, 25):
-        print("=" * 50)
-        print(f"Обучаем модель для горизонта {h} ч вперёд")
-        train_aqi_model(n_hours_ahead=h)
\ No newline at end of file
+    # Обучаем модели для горизонтов 1..24 часов на всех бэкендах
+    report, quality = compare_backends()
+    print("=" * 50)
+    print(report.round(3).to_string())
+    print_quality(quality)